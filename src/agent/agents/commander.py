@@ -1,9 +1,24 @@
+import asyncio
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from .log_agent import LogAgent
 from .metrics_agent import MetricsAgent
 from .deploy_agent import DeployAgent
 
-logger = logging.getLogger()
+logger = logging.getLogger(__name__)
+
+# Persistent loop for the sync batch entry point. asyncio.run() per call
+# would close its loop on return, stranding the shared AsyncClient's
+# keep-alive sockets and failing the next batch with "Event loop is closed".
+_LOOP = None
+
+
+def _get_loop():
+    global _LOOP
+    if _LOOP is None or _LOOP.is_closed():
+        _LOOP = asyncio.new_event_loop()
+    return _LOOP
+
 
 class CommanderAgent:
     def __init__(self):
@@ -11,25 +26,16 @@ class CommanderAgent:
         self.metrics_agent = MetricsAgent()
         self.deploy_agent = DeployAgent()
 
-    def investigate(self, log_payload):
+    def _build_report(self, log_analysis, metrics_analysis, deployment_analysis):
         """
-        Orchestrates the investigation process.
+        Synthesizes findings and formulates the final diagnosis.
         """
-        logger.info("Commander Agent: Starting investigation...")
-        
-        # 1. Gather Intelligence
-        log_analysis = self.log_agent.analyze(log_payload)
-        metrics_analysis = self.metrics_agent.analyze(log_payload)
-        deployment_analysis = self.deploy_agent.analyze()
-
-        # 2. Synthesize Findings
         findings = {
             "log_analysis": log_analysis,
             "metrics_analysis": metrics_analysis,
             "deployment_analysis": deployment_analysis
         }
-        
-        # 3. Formulate Diagnosis
+
         diagnosis = "Unknown Issue"
         if "out of memory" in log_analysis.get("issues", []) or "MemoryUsed" in metrics_analysis.get("alerts", []):
              diagnosis = "Potential Memory Exhaustion"
@@ -41,3 +47,70 @@ class CommanderAgent:
             "diagnosis": diagnosis,
             "details": findings
         }
+
+    def investigate(self, log_payload):
+        """
+        Orchestrates the investigation process.
+        """
+        logger.info("Commander Agent: Starting investigation...")
+
+        # 1. Gather Intelligence. The three agent calls are independent
+        # I/O-bound LLM requests, so dispatch them concurrently and the
+        # wall-clock cost is the slowest agent rather than the sum.
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            log_future = executor.submit(self.log_agent.analyze, log_payload)
+            metrics_future = executor.submit(self.metrics_agent.analyze, log_payload)
+            deploy_future = executor.submit(self.deploy_agent.analyze)
+
+            log_analysis = log_future.result()
+            metrics_analysis = metrics_future.result()
+            deployment_analysis = deploy_future.result()
+
+        # 2. Synthesize Findings and Formulate Diagnosis
+        return self._build_report(log_analysis, metrics_analysis, deployment_analysis)
+
+    async def ainvestigate(self, log_payload):
+        """
+        Async investigation. The three agent calls are independent I/O, so
+        they run concurrently and wall-clock drops from the sum to the max.
+        """
+        logger.info("Commander Agent: Starting investigation (async)...")
+
+        log_analysis, metrics_analysis, deployment_analysis = await asyncio.gather(
+            self.log_agent.aanalyze(log_payload),
+            self.metrics_agent.aanalyze(log_payload),
+            self.deploy_agent.aanalyze()
+        )
+
+        return self._build_report(log_analysis, metrics_analysis, deployment_analysis)
+
+    async def ainvestigate_many(self, log_payloads, max_concurrency=20):
+        """
+        Investigates a batch of log payloads concurrently. Concurrency is
+        bounded with a semaphore so large batches don't trip provider rate
+        limits or exhaust the connection pool.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def investigate_one(payload):
+            async with semaphore:
+                return await self.ainvestigate(payload)
+
+        return await asyncio.gather(*[investigate_one(p) for p in log_payloads])
+
+    def investigate_batch(self, log_payloads, max_concurrency=20):
+        """
+        Sync entry point for the concurrent batch path, for callers (like a
+        Lambda handler) that are not already inside an event loop.
+        """
+        return _get_loop().run_until_complete(
+            self.ainvestigate_many(log_payloads, max_concurrency=max_concurrency))
+
+    def investigate_many(self, log_payloads, max_workers=8):
+        """
+        Thread-based batch investigation for callers that cannot use asyncio.
+        The agent calls are I/O-bound (HTTP waits release the GIL), so a
+        bounded pool gives near-linear speedup with worker count.
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(self.investigate, log_payloads))
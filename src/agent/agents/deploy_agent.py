@@ -1,58 +1,129 @@
 import logging
 import os
 import difflib
-import json
-from langchain_groq import ChatGroq
 from langchain_core.prompts import ChatPromptTemplate
 
-from secrets_manager import get_secret
+from .llm_utils import extract_json, get_llm, invoke_with_backoff, ainvoke_with_backoff, with_json_mode
+
+logger = logging.getLogger(__name__)
+
+# Module-level constant so the prompt string is not rebuilt per call.
+_SYSTEM_PROMPT = "You are an Expert DevOps Engineer. Analyze the following Terraform diff. Identify any changes that could negatively impact system stability (e.g., reducing resources, removing env vars). Return a JSON object with 'changes' (a dictionary where keys are the changed parameters and values are brief explanations of the risk) and 'risk_level' (Low/Medium/High)."
+
+# Compiled once at import; template parsing is pure overhead per call.
+_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", _SYSTEM_PROMPT),
+    ("human", "{diff}")
+])
+
+_ANALYSIS_CACHE_MAXSIZE = 8
 
-logger = logging.getLogger()
 
 class DeployAgent:
     def __init__(self):
         # Assuming data is in ../data relative to this file
         self.data_path = os.path.join(os.path.dirname(__file__), '..', 'data')
-        self.llm = ChatGroq(
-            temperature=0,
-            model_name="openai/gpt-oss-20b", 
-            api_key=get_secret()
-        )
+        self.llm = get_llm()
+        # Chain composed once; analyze() only invokes it. JSON mode is
+        # bound per-chain (this chain is never streamed).
+        self._chain = _PROMPT | with_json_mode(self.llm)
+        # The Terraform files rarely change between investigations, yet every
+        # analyze() re-diffed and re-LLMed them. Cache analyses keyed by both
+        # files' mtimes so repeat calls are a dict lookup.
+        self._analysis_cache = {}
+
+    def _cache_key(self):
+        """Cache key from both Terraform files' mtimes, or None if unreadable."""
+        try:
+            prev_mtime = os.stat(os.path.join(self.data_path, 'main_prev.tf')).st_mtime_ns
+            curr_mtime = os.stat(os.path.join(self.data_path, 'main_current.tf')).st_mtime_ns
+        except OSError:
+            return None
+        return (prev_mtime, curr_mtime)
+
+    def _cache_put(self, key, analysis):
+        self._analysis_cache[key] = analysis
+        if len(self._analysis_cache) > _ANALYSIS_CACHE_MAXSIZE:
+            self._analysis_cache.pop(next(iter(self._analysis_cache)))
+
+    def _build_diff(self):
+        # Compare Terraform files
+        with open(os.path.join(self.data_path, 'main_prev.tf'), 'r') as f:
+            prev_tf = f.readlines()
+        with open(os.path.join(self.data_path, 'main_current.tf'), 'r') as f:
+            curr_tf = f.readlines()
+
+        diff = difflib.unified_diff(prev_tf, curr_tf, fromfile='main_prev.tf', tofile='main_current.tf')
+        return ''.join(diff)
+
+    @staticmethod
+    def _parse_analysis(content):
+        return extract_json(content)
 
     def analyze(self):
         logger.info("Deploy Agent: Analyzing deployment history with LLM...")
-        
-        changes_text = ""
-        # Compare Terraform files
+
+        cache_key = self._cache_key()
+        if cache_key is not None and cache_key in self._analysis_cache:
+            logger.info("Deploy Agent: Terraform files unchanged, using cached analysis")
+            return self._analysis_cache[cache_key]
+
         try:
-            with open(os.path.join(self.data_path, 'main_prev.tf'), 'r') as f:
-                prev_tf = f.readlines()
-            with open(os.path.join(self.data_path, 'main_current.tf'), 'r') as f:
-                curr_tf = f.readlines()
-            
-            diff = difflib.unified_diff(prev_tf, curr_tf, fromfile='main_prev.tf', tofile='main_current.tf')
-            changes_text = ''.join(diff)
-                
+            changes_text = self._build_diff()
         except Exception as e:
-            logger.error(f"Failed to compare terraform files: {e}")
+            logger.error("Failed to compare terraform files: %s", e)
             return {"error": str(e)}
 
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", "You are an Expert DevOps Engineer. Analyze the following Terraform diff. Identify any changes that could negatively impact system stability (e.g., reducing resources, removing env vars). Return a JSON object with 'changes' (a dictionary where keys are the changed parameters and values are brief explanations of the risk) and 'risk_level' (Low/Medium/High)."),
-            ("human", "{diff}")
-        ])
+        # Identical files produce an empty diff; there is nothing for the LLM
+        # to assess, so skip the round-trip entirely.
+        if not changes_text:
+            logger.info("Deploy Agent: No Terraform changes detected, skipping LLM call")
+            analysis = {"changes": {}, "risk_level": "Low"}
+            if cache_key is not None:
+                self._cache_put(cache_key, analysis)
+            return analysis
+
+        try:
+            response = invoke_with_backoff(self._chain, {"diff": changes_text})
+            analysis = self._parse_analysis(response.content)
+            if cache_key is not None:
+                self._cache_put(cache_key, analysis)
+            return analysis
+        except Exception as e:
+            return {"error": str(e), "changes": {}}
+
+    async def aanalyze(self):
+        """
+        Async variant of analyze() so independent agent calls can overlap
+        instead of serializing on blocking HTTP.
+        """
+        logger.info("Deploy Agent: Analyzing deployment history with LLM (async)...")
+
+        cache_key = self._cache_key()
+        if cache_key is not None and cache_key in self._analysis_cache:
+            logger.info("Deploy Agent: Terraform files unchanged, using cached analysis")
+            return self._analysis_cache[cache_key]
+
+        try:
+            changes_text = self._build_diff()
+        except Exception as e:
+            logger.error("Failed to compare terraform files: %s", e)
+            return {"error": str(e)}
 
-        chain = prompt | self.llm
+        # Identical files produce an empty diff; there is nothing for the LLM
+        # to assess, so skip the round-trip entirely.
+        if not changes_text:
+            logger.info("Deploy Agent: No Terraform changes detected, skipping LLM call")
+            analysis = {"changes": {}, "risk_level": "Low"}
+            if cache_key is not None:
+                self._cache_put(cache_key, analysis)
+            return analysis
 
         try:
-            response = chain.invoke({"diff": changes_text})
-            # Naive parsing
-            content = response.content
-            if "```json" in content:
-                content = content.split("```json")[1].split("```")[0]
-            elif "```" in content:
-                content = content.split("```")[1].split("```")[0]
-            
-            return json.loads(content)
+            response = await ainvoke_with_backoff(self._chain, {"diff": changes_text})
+            analysis = self._parse_analysis(response.content)
+            if cache_key is not None:
+                self._cache_put(cache_key, analysis)
+            return analysis
         except Exception as e:
             return {"error": str(e), "changes": {}}
@@ -1,52 +1,28 @@
+import asyncio
 import os
 import logging
 import json
-from langchain_groq import ChatGroq
+import orjson
 from langchain_core.prompts import ChatPromptTemplate
 
-from secrets_manager import get_secret
+from .llm_utils import extract_json, get_llm, with_json_mode, invoke_with_backoff, astream_text_with_backoff
 
-logger = logging.getLogger()
+logger = logging.getLogger(__name__)
 
+# Severity ranking hoisted to module level so the fallback path doesn't
+# rebuild lookup structures per call.
+_SEVERITY_RANK = {"Low": 0, "Medium": 1, "High": 2, "Critical": 3}
 
-class InvestigationAgent:
-    """
-    The Investigation Agent synthesizes findings from all specialized agents
-    (LogAgent, MetricsAgent, DeployAgent) and produces a comprehensive
-    final investigation report with root cause analysis and recommendations.
-    """
-
-    def __init__(self):
-        self.llm = ChatGroq(
-            temperature=0,
-            model_name="openai/gpt-oss-20b",
-            api_key=get_secret()
-        )
 
-    def synthesize(self, log_analysis: dict, metrics_analysis: dict, deployment_analysis: dict) -> dict:
-        """
-        Synthesizes findings from all agents into a final investigation report.
-        
-        Args:
-            log_analysis: Analysis results from LogAgent
-            metrics_analysis: Analysis results from MetricsAgent
-            deployment_analysis: Analysis results from DeployAgent
-            
-        Returns:
-            A comprehensive investigation report with diagnosis, root cause, 
-            severity, and recommendations.
-        """
-        logger.info("Investigation Agent: Synthesizing findings from all agents...")
+def _escalate(severity, candidate):
+    """Returns whichever of the two severities ranks higher."""
+    if _SEVERITY_RANK.get(candidate, 0) > _SEVERITY_RANK.get(severity, 0):
+        return candidate
+    return severity
 
-        # Prepare the combined findings for the LLM
-        combined_findings = {
-            "log_analysis": log_analysis,
-            "metrics_analysis": metrics_analysis,
-            "deployment_analysis": deployment_analysis
-        }
 
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", """You are a Senior Site Reliability Engineer (SRE) and Incident Commander. 
+# Module-level constants so the ~1KB prompt strings are not rebuilt per call.
+_SYSTEM_PROMPT = """You are a Senior Site Reliability Engineer (SRE) and Incident Commander.
 Your task is to analyze the investigation findings from multiple specialized agents and produce a comprehensive incident report.
 
 You will receive:
@@ -74,8 +50,9 @@ Based on these findings, produce a JSON report with the following structure:
     "additional_investigation_needed": ["list of areas needing more investigation, if any"]
 }}
 
-Be thorough but concise. Focus on actionable insights."""),
-            ("human", """Here are the investigation findings:
+Be thorough but concise. Focus on actionable insights."""
+
+_HUMAN_PROMPT = """Here are the investigation findings:
 
 **Log Analysis:**
 {log_analysis}
@@ -86,86 +63,251 @@ Be thorough but concise. Focus on actionable insights."""),
 **Deployment Analysis:**
 {deployment_analysis}
 
-Please synthesize these findings into a comprehensive incident report.""")
-        ])
+Please synthesize these findings into a comprehensive incident report."""
 
-        chain = prompt | self.llm
+# Compiled once at import; template parsing is pure overhead per call.
+_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", _SYSTEM_PROMPT),
+    ("human", _HUMAN_PROMPT)
+])
 
-        try:
-            response = chain.invoke({
-                "log_analysis": json.dumps(log_analysis, indent=2, default=str),
-                "metrics_analysis": json.dumps(metrics_analysis, indent=2, default=str),
-                "deployment_analysis": json.dumps(deployment_analysis, indent=2, default=str)
-            })
-
-            # Parse the LLM response
-            content = response.content
-            
-            # Handle JSON wrapped in markdown code blocks
-            if "```json" in content:
-                content = content.split("```json")[1].split("```")[0]
-            elif "```" in content:
-                content = content.split("```")[1].split("```")[0]
+# Bulky keys an upstream analysis may carry (raw CloudWatch events, nested
+# evidence from a re-synthesized report). They add tokens without helping the
+# correlation, so they are stripped from the prompt — the untouched analyses
+# are still attached to the report as supporting_evidence.
+_NOISY_KEYS = frozenset({"supporting_evidence", "logEvents"})
 
-            report = json.loads(content.strip())
-            
-            # Add the raw findings as supporting evidence
-            report["supporting_evidence"] = {
-                "log_analysis": log_analysis,
-                "metrics_analysis": metrics_analysis,
-                "deployment_analysis": deployment_analysis
-            }
+# Hard ceiling on async synthesis wall-clock. If the LLM hasn't produced a
+# report by then, the concurrently computed rule-based fallback is returned
+# instead, so tail latency is bounded rather than riding the provider's p99.
+_SLA_SECONDS = float(os.environ.get("SYNTHESIS_SLA_SECONDS", "45"))
+
+
+def _slim(analysis: dict) -> dict:
+    """Shallow copy of an analysis without known-bulky keys."""
+    if not _NOISY_KEYS.intersection(analysis):
+        return analysis
+    return {k: v for k, v in analysis.items() if k not in _NOISY_KEYS}
+
+
+class InvestigationAgent:
+    """
+    The Investigation Agent synthesizes findings from all specialized agents
+    (LogAgent, MetricsAgent, DeployAgent) and produces a comprehensive
+    final investigation report with root cause analysis and recommendations.
+    """
+
+    def __init__(self):
+        self.llm = get_llm()
+        # Chain composed once; synthesize() only invokes it. The invoke()d
+        # chain gets provider JSON mode; the streaming chain must not — Groq
+        # rejects JSON mode combined with streaming, so _astream_report
+        # relies on the prompt plus extract_json instead.
+        self._chain = _PROMPT | with_json_mode(self.llm)
+        self._stream_chain = _PROMPT | self.llm
+
+    def synthesize(self, log_analysis: dict, metrics_analysis: dict, deployment_analysis: dict) -> dict:
+        """
+        Synthesizes findings from all agents into a final investigation report.
+        
+        Args:
+            log_analysis: Analysis results from LogAgent
+            metrics_analysis: Analysis results from MetricsAgent
+            deployment_analysis: Analysis results from DeployAgent
             
-            logger.info(f"Investigation Agent: Report generated with severity={report.get('severity', 'Unknown')}")
-            return report
+        Returns:
+            A comprehensive investigation report with diagnosis, root cause, 
+            severity, and recommendations.
+        """
+        logger.info("Investigation Agent: Synthesizing findings from all agents...")
+
+        # When every agent comes back clean there is nothing for the LLM to
+        # correlate; skip the synthesis round-trip and report healthy.
+        if self._all_clear(log_analysis, metrics_analysis, deployment_analysis):
+            logger.info("Investigation Agent: All agents report healthy, skipping LLM synthesis")
+            return self._healthy_report(log_analysis, metrics_analysis, deployment_analysis)
+
+        try:
+            response = invoke_with_backoff(
+                self._chain,
+                self._build_chain_input(log_analysis, metrics_analysis, deployment_analysis))
+            return self._finish_report(
+                response.content, log_analysis, metrics_analysis, deployment_analysis)
 
         except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse LLM response as JSON: {e}")
+            logger.error("Failed to parse LLM response as JSON: %s", e)
             # Return a structured fallback response
             return self._fallback_synthesis(log_analysis, metrics_analysis, deployment_analysis, str(e))
         except Exception as e:
-            logger.error(f"Investigation Agent synthesis failed: {e}")
+            logger.error("Investigation Agent synthesis failed: %s", e)
+            return self._fallback_synthesis(log_analysis, metrics_analysis, deployment_analysis, str(e))
+
+    async def asynthesize(self, log_analysis: dict, metrics_analysis: dict, deployment_analysis: dict) -> dict:
+        """
+        Async variant of synthesize() that streams the LLM response.
+
+        The final report is the longest single generation in the graph, so
+        tokens are consumed with astream() as they arrive rather than waiting
+        on a buffered ainvoke(). The JSON is still parsed once at the end —
+        Lambda buffers the whole response anyway, so an incremental parser
+        would add a dependency without moving time-to-first-byte.
+
+        The rule-based fallback is computed concurrently in a worker thread
+        and returned if the LLM misses the SLA, so worst-case latency for
+        this step is bounded at _SLA_SECONDS instead of the provider's tail.
+        """
+        logger.info("Investigation Agent: Synthesizing findings from all agents (async)...")
+
+        if self._all_clear(log_analysis, metrics_analysis, deployment_analysis):
+            logger.info("Investigation Agent: All agents report healthy, skipping LLM synthesis")
+            return self._healthy_report(log_analysis, metrics_analysis, deployment_analysis)
+
+        loop = asyncio.get_running_loop()
+        llm_task = asyncio.ensure_future(
+            self._astream_report(log_analysis, metrics_analysis, deployment_analysis))
+        # Cheap, so compute it alongside the LLM call; on an SLA miss the
+        # answer is already sitting there instead of being built afterwards.
+        fallback_task = loop.run_in_executor(
+            None, self._fallback_synthesis, log_analysis, metrics_analysis,
+            deployment_analysis, f"LLM synthesis exceeded the {_SLA_SECONDS:.0f}s SLA")
+
+        done, _ = await asyncio.wait({llm_task}, timeout=_SLA_SECONDS)
+        if llm_task not in done:
+            logger.warning("Investigation Agent: LLM synthesis exceeded %.0fs SLA, returning rule-based fallback", _SLA_SECONDS)
+            llm_task.cancel()
+            return await fallback_task
+
+        fallback_task.cancel()
+        try:
+            return llm_task.result()
+        except json.JSONDecodeError as e:
+            logger.error("Failed to parse LLM response as JSON: %s", e)
+            return self._fallback_synthesis(log_analysis, metrics_analysis, deployment_analysis, str(e))
+        except Exception as e:
+            logger.error("Investigation Agent synthesis failed: %s", e)
             return self._fallback_synthesis(log_analysis, metrics_analysis, deployment_analysis, str(e))
 
-    def _fallback_synthesis(self, log_analysis: dict, metrics_analysis: dict, 
+    async def _astream_report(self, log_analysis: dict, metrics_analysis: dict,
+                              deployment_analysis: dict) -> dict:
+        """
+        Streams the synthesis chain and assembles the final report. Transient
+        failures are retried within the SLA budget; the asynthesize() race
+        still caps the total wall-clock at _SLA_SECONDS.
+        """
+        response_text = await astream_text_with_backoff(
+            self._stream_chain,
+            self._build_chain_input(log_analysis, metrics_analysis, deployment_analysis),
+            max_wait=_SLA_SECONDS)
+        return self._finish_report(
+            response_text, log_analysis, metrics_analysis, deployment_analysis)
+
+    @staticmethod
+    def _build_chain_input(log_analysis: dict, metrics_analysis: dict, deployment_analysis: dict) -> dict:
+        # Compact separators, no indentation: pretty-printing whitespace is
+        # charged as input tokens but carries no meaning for the model. The
+        # full analyses still land in supporting_evidence after the call.
+        return {
+            "log_analysis": orjson.dumps(_slim(log_analysis), default=str).decode(),
+            "metrics_analysis": orjson.dumps(_slim(metrics_analysis), default=str).decode(),
+            "deployment_analysis": orjson.dumps(_slim(deployment_analysis), default=str).decode()
+        }
+
+    @staticmethod
+    def _finish_report(response_text: str, log_analysis: dict, metrics_analysis: dict,
+                       deployment_analysis: dict) -> dict:
+        # Parse the LLM response (handles markdown fences and trailing prose)
+        report = extract_json(response_text)
+
+        # Add the raw findings as supporting evidence
+        report["supporting_evidence"] = {
+            "log_analysis": log_analysis,
+            "metrics_analysis": metrics_analysis,
+            "deployment_analysis": deployment_analysis
+        }
+
+        logger.info("Investigation Agent: Report generated with severity=%s", report.get('severity', 'Unknown'))
+        return report
+
+    @staticmethod
+    def _healthy_report(log_analysis: dict, metrics_analysis: dict, deployment_analysis: dict) -> dict:
+        return {
+            "status": "Investigation Complete",
+            "severity": "Low",
+            "root_cause": "No incident detected",
+            "diagnosis": "All specialized agents reported healthy findings with no issues, alerts, or risky deployment changes",
+            "correlation": "Nothing to correlate - no findings",
+            "affected_components": [],
+            "recommendations": [],
+            "confidence_level": "High",
+            "additional_investigation_needed": [],
+            "supporting_evidence": {
+                "log_analysis": log_analysis,
+                "metrics_analysis": metrics_analysis,
+                "deployment_analysis": deployment_analysis
+            }
+        }
+
+    @staticmethod
+    def _all_clear(log_analysis: dict, metrics_analysis: dict, deployment_analysis: dict) -> bool:
+        """
+        True only when every agent reported a clean, error-free result.
+        """
+        return (
+            "error" not in log_analysis
+            and not log_analysis.get("issues")
+            and "error" not in metrics_analysis
+            and not metrics_analysis.get("alerts")
+            and metrics_analysis.get("status") == "healthy"
+            and "error" not in deployment_analysis
+            and not deployment_analysis.get("changes")
+            and deployment_analysis.get("risk_level", "Low") == "Low"
+        )
+
+    def _fallback_synthesis(self, log_analysis: dict, metrics_analysis: dict,
                            deployment_analysis: dict, error: str) -> dict:
         """
         Provides a rule-based fallback synthesis when LLM fails.
         """
         logger.info("Investigation Agent: Using fallback rule-based synthesis...")
         
-        # Simple rule-based diagnosis
+        # Simple rule-based diagnosis. Each issue is inspected exactly once as
+        # it is collected, instead of rescanning the full list per question.
         issues = []
         severity = "Low"
-        
+        has_memory_issue = False
+
         # Check log issues
-        log_issues = log_analysis.get("issues", [])
-        if log_issues:
-            issues.extend(log_issues)
-            if any("memory" in str(issue).lower() or "error" in str(issue).lower() 
-                   for issue in log_issues):
-                severity = "High"
-        
+        for issue in log_analysis.get("issues", []):
+            issues.append(issue)
+            lowered = str(issue).lower()
+            if "memory" in lowered:
+                has_memory_issue = True
+                severity = _escalate(severity, "High")
+            elif "error" in lowered:
+                severity = _escalate(severity, "High")
+
         # Check metrics alerts
         metrics_alerts = metrics_analysis.get("alerts", [])
         if metrics_alerts:
-            issues.extend([f"Metric Alert: {alert}" for alert in metrics_alerts])
+            for alert in metrics_alerts:
+                issues.append(f"Metric Alert: {alert}")
+                if "memory" in str(alert).lower():
+                    has_memory_issue = True
             if metrics_analysis.get("status") == "critical":
-                severity = "Critical"
-            elif metrics_analysis.get("status") == "degraded" and severity != "Critical":
-                severity = "High"
-        
+                severity = _escalate(severity, "Critical")
+            elif metrics_analysis.get("status") == "degraded":
+                severity = _escalate(severity, "High")
+
         # Check deployment risks
         deploy_risk = deployment_analysis.get("risk_level", "Low")
         deploy_changes = deployment_analysis.get("changes", {})
         if deploy_risk in ["High", "Medium"]:
-            if severity == "Low":
-                severity = "Medium"
+            severity = _escalate(severity, "Medium")
             issues.append(f"Recent deployment changes with {deploy_risk} risk")
-        
+
         # Correlate memory issues
         root_cause = "Unable to determine root cause - manual investigation required"
-        if any("memory" in str(issue).lower() for issue in issues):
+        if has_memory_issue:
             if "memory_size" in deploy_changes:
                 root_cause = "Memory exhaustion likely caused by recent memory_size reduction in deployment"
             else:
@@ -0,0 +1,202 @@
+import asyncio
+import json
+import logging
+import re
+import threading
+import time
+
+import httpx
+import orjson
+from langchain_groq import ChatGroq
+
+from secrets_manager import get_secret
+
+logger = logging.getLogger(__name__)
+
+# Process-wide ChatGroq clients shared by all agents. One client means one
+# underlying HTTP connection pool, so concurrent agents reuse keep-alive
+# sockets instead of paying a TCP/TLS handshake per agent instance.
+_LLM = None
+_FAST_LLM = None
+_LLM_LOCK = threading.Lock()
+
+
+def _make_llm(model_name):
+    # Generous keep-alive limits so the concurrent fan-out and batch paths
+    # reuse warm sockets instead of opening a new TCP+TLS connection per
+    # in-flight request.
+    limits = httpx.Limits(max_keepalive_connections=32, max_connections=64)
+    return ChatGroq(
+        temperature=0,
+        model_name=model_name,
+        api_key=get_secret(),
+        http_client=httpx.Client(limits=limits),
+        http_async_client=httpx.AsyncClient(limits=limits)
+    )
+
+
+def with_json_mode(llm):
+    """
+    Binds Groq JSON mode so the provider guarantees a valid JSON object and
+    extract_json never has to recover from fences or trailing prose.
+
+    Only for chains that are invoke()d: Groq rejects JSON mode combined with
+    streaming, so astream() paths must use the unbound client and rely on
+    the prompt plus extract_json.
+    """
+    return llm.bind(response_format={"type": "json_object"})
+
+
+def get_llm():
+    """Returns the shared ChatGroq client, creating it on first use."""
+    global _LLM
+    if _LLM is None:
+        with _LLM_LOCK:
+            if _LLM is None:
+                _LLM = _make_llm("openai/gpt-oss-20b")
+    return _LLM
+
+
+def get_fast_llm():
+    """
+    Returns the shared small-model client used for the cheap first pass of
+    the classification cascade; routine traffic never needs the big model.
+    """
+    global _FAST_LLM
+    if _FAST_LLM is None:
+        with _LLM_LOCK:
+            if _FAST_LLM is None:
+                _FAST_LLM = _make_llm("llama-3.1-8b-instant")
+    return _FAST_LLM
+
+# Module-level decoder so it isn't reconstructed per parse.
+_JSON_DECODER = json.JSONDecoder()
+
+# Matches a JSON object inside a markdown code fence. Precompiled once; when
+# the model fences its answer this pins the extraction to the fenced object
+# even if the surrounding prose contains braces.
+_FENCE_RE = re.compile(r"```(?:json)?\s*(\{.*?\})\s*```", re.DOTALL)
+
+
+def extract_json(response_text):
+    """
+    Extracts the first JSON object from an LLM response.
+
+    A fenced ```json block, if present, wins. Otherwise: orjson.loads on the
+    first-'{' / last-'}' slice at C speed, falling back to a stdlib
+    raw_decode from the first '{' for responses where the slice isn't a
+    clean object (e.g. prose containing '}' after the JSON).
+    """
+    fenced = _FENCE_RE.search(response_text)
+    if fenced:
+        response_text = fenced.group(1)
+
+    start = response_text.find('{')
+    if start == -1:
+        raise ValueError("No JSON object found in LLM response")
+    end = response_text.rfind('}')
+    if end > start:
+        try:
+            return orjson.loads(response_text[start:end + 1])
+        except orjson.JSONDecodeError:
+            pass
+    obj, _ = _JSON_DECODER.raw_decode(response_text, start)
+    return obj
+
+# Backoff schedule shared by the sync and async helpers: start at 200ms and
+# grow 1.5x per attempt, capped at 5 seconds between attempts. The default
+# deadline is sized for a Lambda latency budget — the groq SDK already
+# retries twice internally, and callers have fallbacks for hard failures.
+_INITIAL_DELAY = 0.2
+_BACKOFF_FACTOR = 1.5
+_MAX_DELAY = 5.0
+_DEFAULT_MAX_WAIT = 20
+
+# Status codes worth retrying: timeouts, rate limits and server-side errors.
+# Anything else (401 bad key, 400 malformed request, context overflow) will
+# fail identically on every attempt and should reach the fallbacks at once.
+_RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+def _is_transient(error):
+    """True for errors a retry can plausibly fix."""
+    if isinstance(error, httpx.TransportError):
+        return True
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status in _RETRYABLE_STATUS
+
+
+def _next_delay(attempt):
+    return min(_MAX_DELAY, _INITIAL_DELAY * (_BACKOFF_FACTOR ** attempt))
+
+
+def invoke_with_backoff(chain, chain_input, max_wait=_DEFAULT_MAX_WAIT):
+    """
+    Invokes a chain, retrying transient failures with exponential backoff.
+
+    Only transient errors (connection problems, rate limits, 5xx) are
+    retried, and only until max_wait seconds have elapsed; everything else
+    re-raises immediately so the caller's fallback handling kicks in.
+    """
+    deadline = time.monotonic() + max_wait
+    attempt = 0
+    while True:
+        try:
+            return chain.invoke(chain_input)
+        except Exception as e:
+            if not _is_transient(e):
+                raise
+            delay = _next_delay(attempt)
+            if time.monotonic() + delay >= deadline:
+                raise
+            logger.warning("LLM call failed (attempt %d), retrying in %.1fs: %s", attempt + 1, delay, e)
+            time.sleep(delay)
+            attempt += 1
+
+
+async def astream_text_with_backoff(chain, chain_input, max_wait=_DEFAULT_MAX_WAIT):
+    """
+    Streams a chain and returns the concatenated text content, retrying
+    transient failures like invoke_with_backoff. A failure mid-stream
+    discards the partial output and restarts the stream from scratch.
+    """
+    deadline = time.monotonic() + max_wait
+    attempt = 0
+    while True:
+        try:
+            chunks = []
+            async for chunk in chain.astream(chain_input):
+                chunks.append(chunk.content)
+            return "".join(chunks)
+        except Exception as e:
+            if not _is_transient(e):
+                raise
+            delay = _next_delay(attempt)
+            if time.monotonic() + delay >= deadline:
+                raise
+            logger.warning("LLM call failed (attempt %d), retrying in %.1fs: %s", attempt + 1, delay, e)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+
+async def ainvoke_with_backoff(chain, chain_input, max_wait=_DEFAULT_MAX_WAIT):
+    """
+    Async counterpart of invoke_with_backoff using asyncio.sleep so retries
+    don't block the event loop.
+    """
+    deadline = time.monotonic() + max_wait
+    attempt = 0
+    while True:
+        try:
+            return await chain.ainvoke(chain_input)
+        except Exception as e:
+            if not _is_transient(e):
+                raise
+            delay = _next_delay(attempt)
+            if time.monotonic() + delay >= deadline:
+                raise
+            logger.warning("LLM call failed (attempt %d), retrying in %.1fs: %s", attempt + 1, delay, e)
+            await asyncio.sleep(delay)
+            attempt += 1
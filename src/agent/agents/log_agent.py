@@ -1,47 +1,225 @@
 import os
+import re
 import json
+import time
+import hashlib
 import logging
-from langchain_groq import ChatGroq
+from collections import OrderedDict
 from langchain_core.prompts import ChatPromptTemplate
 
-from secrets_manager import get_secret
+from .llm_utils import extract_json, get_llm, get_fast_llm, invoke_with_backoff, ainvoke_with_backoff, with_json_mode
+
+logger = logging.getLogger(__name__)
+
+# Volatile tokens stripped before fingerprinting, so the same underlying error
+# (e.g. a recurring timeout or OOM) hashes to the same cache key regardless of
+# timestamps, UUIDs or request IDs embedded in the message.
+_VOLATILE_RE = re.compile(
+    r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?"  # ISO timestamps
+    r"|[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}"  # UUIDs
+    r"|\b\d{10,13}\b"  # epoch timestamps
+    r"|\[repeated \d+x\]"  # dedup annotations added in _build_input
+)
+
+_CACHE_MAXSIZE = 4096
+
+# Cap on the log text shipped to the LLM (~12k tokens), so an unusually
+# large CloudWatch batch can't blow the model's context window.
+_MAX_LOGS_CHARS = 48_000
+
+# Persistent tier for the analysis cache. /tmp survives across warm Lambda
+# invocations, so recurring errors don't pay a fresh LLM call after every
+# cold start of the in-memory cache. Entries expire after a week so updated
+# upstream knowledge still propagates.
+_DISK_CACHE_PATH = os.environ.get("LOG_CACHE_PATH", "/tmp/incident_commander_log_cache.json")
+_DISK_CACHE_TTL = 7 * 24 * 3600  # seconds
+
+# Module-level constants so neither the ~1KB prompt string nor the compiled
+# template is rebuilt per call.
+_SYSTEM_PROMPT = "You are an expert Log Analyst. Analyze the following logs and return a JSON object with 'issues' (list of strings describing specific errors found) and 'summary' (brief text). If no errors, 'issues' should be empty."
+
+_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", _SYSTEM_PROMPT),
+    ("human", "{logs}")
+])
+
+
+def _fingerprint(logs_text):
+    """Hash of the logs with volatile tokens stripped out."""
+    normalized = _VOLATILE_RE.sub("", logs_text)
+    return hashlib.blake2b(normalized.encode(), digest_size=16).hexdigest()
 
-logger = logging.getLogger()
 
 class LogAgent:
     def __init__(self):
-        self.llm = ChatGroq(
-            temperature=0,
-            model_name="openai/gpt-oss-20b",
-            api_key=get_secret()
-        )
+        self.llm = get_llm()
+        self.fast_llm = get_fast_llm()
+        # Chains composed once; analyze() only invokes them. JSON mode is
+        # bound per-chain (these are never streamed).
+        self._chain = _PROMPT | with_json_mode(self.llm)
+        self._fast_chain = _PROMPT | with_json_mode(self.fast_llm)
+        # LRU cache of analyses keyed by log fingerprint, with values stored
+        # as (timestamp, analysis). Production log streams repeat the same
+        # errors constantly, so a hit replaces a full LLM round-trip with a
+        # dict lookup.
+        self._cache = OrderedDict()
+        self._load_disk_cache()
+
+    def _load_disk_cache(self):
+        try:
+            with open(_DISK_CACHE_PATH) as f:
+                entries = json.load(f)
+            cutoff = time.time() - _DISK_CACHE_TTL
+            for key, (ts, analysis) in entries.items():
+                if ts >= cutoff:
+                    self._cache[key] = (ts, analysis)
+        except (OSError, ValueError, TypeError, AttributeError):
+            # A corrupt or wrong-shaped cache file (not a dict, entries that
+            # aren't [ts, analysis] pairs, non-numeric timestamps) must never
+            # take down __init__ — graph.py constructs agents at import, so a
+            # crash here would loop every Lambda cold start until /tmp is
+            # cleared. Start cold instead.
+            self._cache.clear()
+            return
+        while len(self._cache) > _CACHE_MAXSIZE:
+            self._cache.popitem(last=False)
+
+    def _save_disk_cache(self):
+        try:
+            tmp_path = _DISK_CACHE_PATH + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(dict(self._cache), f)
+            os.replace(tmp_path, _DISK_CACHE_PATH)
+        except OSError as e:
+            logger.warning("Failed to persist log analysis cache: %s", e)
+
+    def _cache_get(self, key):
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        ts, analysis = entry
+        if time.time() - ts > _DISK_CACHE_TTL:
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return analysis
+
+    def _cache_put(self, key, analysis):
+        self._cache[key] = (time.time(), analysis)
+        if len(self._cache) > _CACHE_MAXSIZE:
+            self._cache.popitem(last=False)
+        self._save_disk_cache()
+
+    def _build_input(self, log_payload):
+        log_events = log_payload.get('logEvents', [])
+
+        # Real log streams repeat the same message heavily (identical stack
+        # traces, heartbeats). Collapse duplicates to one line annotated with
+        # the repeat count, so the LLM classifies each distinct message once
+        # and the prompt stays small.
+        # Direct indexing rather than .get(): both keys are guaranteed by the
+        # CloudWatch Logs envelope, and it skips a method dispatch per field
+        # on payloads with thousands of events.
+        counts = {}
+        first_timestamp = {}
+        for e in log_events:
+            message = e['message']
+            if message in counts:
+                counts[message] += 1
+            else:
+                counts[message] = 1
+                first_timestamp[message] = e['timestamp']
+
+        lines = []
+        total_chars = 0
+        dropped = 0
+        for message, count in counts.items():
+            line = f"{first_timestamp[message]}: {message}"
+            if count > 1:
+                line += f" [repeated {count}x]"
+            if total_chars + len(line) > _MAX_LOGS_CHARS:
+                dropped += 1
+                continue
+            total_chars += len(line) + 1
+            lines.append(line)
+        if dropped:
+            logger.warning("Log Agent: Dropped %d distinct message(s) to stay under the prompt size cap", dropped)
+            lines.append(f"[{dropped} additional distinct message(s) omitted to fit the context window]")
+        logs_text = "\n".join(lines)
+
+        return {"logs": logs_text}
+
+    @staticmethod
+    def _parse_analysis(content):
+        return extract_json(content)
 
     def analyze(self, log_payload):
         logger.info("Log Agent: Analyzing logs with LLM...")
-        
-        log_events = log_payload.get('logEvents', [])
-        logs_text = "\n".join([f"{e.get('timestamp')}: {e.get('message')}" for e in log_events])
-
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", "You are an expert Log Analyst. Analyze the following logs and return a JSON object with 'issues' (list of strings describing specific errors found) and 'summary' (brief text). If no errors, 'issues' should be empty."),
-            ("human", "{logs}")
-        ])
-        
-        chain = prompt | self.llm
-        
+
+        chain_input = self._build_input(log_payload)
+
+        cache_key = _fingerprint(chain_input["logs"])
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            logger.info("Log Agent: Cache hit, skipping LLM call")
+            return cached
+
+        # Two-tier cascade: classify with the small model first, and escalate
+        # to the large model only when the cheap pass errors out or found
+        # issues worth a deeper look. Routine INFO/heartbeat batches never
+        # touch the big model.
+        analysis = None
         try:
-            response = chain.invoke({"logs": logs_text})
-            # Naive parsing, in production use JsonOutputParser
-            content = response.content
-            # Try to find JSON in the response if it's wrapped in backticks
-            if "```json" in content:
-                content = content.split("```json")[1].split("```")[0]
-            elif "```" in content:
-                content = content.split("```")[1].split("```")[0]
-            
-            analysis = json.loads(content)
-            return analysis
-            
+            response = invoke_with_backoff(self._fast_chain, chain_input, max_wait=10)
+            analysis = self._parse_analysis(response.content)
         except Exception as e:
-            logger.error(f"LLM Analysis failed: {e}")
-            return {"error": str(e), "issues": []}
+            logger.warning("Fast-model analysis failed, escalating: %s", e)
+
+        if analysis is None or analysis.get("issues"):
+            try:
+                response = invoke_with_backoff(self._chain, chain_input)
+                analysis = self._parse_analysis(response.content)
+            except Exception as e:
+                if analysis is None:
+                    logger.error("LLM Analysis failed: %s", e)
+                    return {"error": str(e), "issues": []}
+                logger.warning("Escalation failed, keeping fast-model analysis: %s", e)
+
+        self._cache_put(cache_key, analysis)
+        return analysis
+
+    async def aanalyze(self, log_payload):
+        """
+        Async variant of analyze() so independent agent calls can overlap
+        instead of serializing on blocking HTTP.
+        """
+        logger.info("Log Agent: Analyzing logs with LLM (async)...")
+
+        chain_input = self._build_input(log_payload)
+
+        cache_key = _fingerprint(chain_input["logs"])
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            logger.info("Log Agent: Cache hit, skipping LLM call")
+            return cached
+
+        # Same two-tier cascade as analyze().
+        analysis = None
+        try:
+            response = await ainvoke_with_backoff(self._fast_chain, chain_input, max_wait=10)
+            analysis = self._parse_analysis(response.content)
+        except Exception as e:
+            logger.warning("Fast-model analysis failed, escalating: %s", e)
+
+        if analysis is None or analysis.get("issues"):
+            try:
+                response = await ainvoke_with_backoff(self._chain, chain_input)
+                analysis = self._parse_analysis(response.content)
+            except Exception as e:
+                if analysis is None:
+                    logger.error("LLM Analysis failed: %s", e)
+                    return {"error": str(e), "issues": []}
+                logger.warning("Escalation failed, keeping fast-model analysis: %s", e)
+
+        self._cache_put(cache_key, analysis)
+        return analysis
@@ -1,47 +1,67 @@
 import json
-from langchain_groq import ChatGroq
 from langchain_core.prompts import ChatPromptTemplate
 import logging
-import os
-from langchain_groq import ChatGroq
 
-logger = logging.getLogger()
+from .llm_utils import extract_json, get_llm, invoke_with_backoff, ainvoke_with_backoff, with_json_mode
+
+logger = logging.getLogger(__name__)
+
+# Module-level constant so the prompt string is not rebuilt per call.
+_SYSTEM_PROMPT = "You are an expert Systems Engineer. Analyze the provided system metrics and return a JSON object with 'status' (healthy/degraded/critical) and 'alerts' (list of specific concerns)."
+
+# Mocking the data fetch still, but using LLM to interpret it. Serialized
+# once at import so every request body is byte-identical — a requirement for
+# provider-side prompt prefix caching to hit.
+_MOCK_METRICS_JSON = json.dumps({
+    "cpu_utilization": "10%",
+    "memory_utilization": "95%",
+    "disk_io": "normal"
+})
+
+# Compiled once at import; template parsing is pure overhead per call.
+_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", _SYSTEM_PROMPT),
+    ("human", "{metrics}")
+])
 
 class MetricsAgent:
     def __init__(self):
-        self.llm = ChatGroq(
-            temperature=0, 
-            model_name="openai/gpt-oss-20b",
-            api_key=os.getenv("GROQ_API_KEY")
-        )
+        self.llm = get_llm()
+        # Chain composed once; analyze() only invokes it. JSON mode is
+        # bound per-chain (this chain is never streamed).
+        self._chain = _PROMPT | with_json_mode(self.llm)
+
+    def _build_chain_and_input(self):
+        return self._chain, {"metrics": _MOCK_METRICS_JSON}
+
+    @staticmethod
+    def _parse_analysis(content):
+        return extract_json(content)
 
     def analyze(self, log_payload):
         logger.info("Metrics Agent: Fetching system metrics and analyzing with LLM...")
-        
-        # Mocking the data fetch still, but using LLM to interpret it
-        mock_metrics = {
-            "cpu_utilization": "10%",
-            "memory_utilization": "95%",
-            "disk_io": "normal"
-        }
-        
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", "You are an expert Systems Engineer. Analyze the provided system metrics and return a JSON object with 'status' (healthy/degraded/critical) and 'alerts' (list of specific concerns)."),
-            ("human", "{metrics}")
-        ])
-        
-        chain = prompt | self.llm
-        
+
+        chain, chain_input = self._build_chain_and_input()
+
+        try:
+            response = invoke_with_backoff(chain, chain_input)
+            return self._parse_analysis(response.content)
+        except Exception as e:
+            logger.error("LLM Analysis failed: %s", e)
+            return {"error": str(e), "alerts": ["High MemoryUsed detected (Fallback)"]}
+
+    async def aanalyze(self, log_payload):
+        """
+        Async variant of analyze() so independent agent calls can overlap
+        instead of serializing on blocking HTTP.
+        """
+        logger.info("Metrics Agent: Fetching system metrics and analyzing with LLM (async)...")
+
+        chain, chain_input = self._build_chain_and_input()
+
         try:
-            response = chain.invoke({"metrics": json.dumps(mock_metrics)})
-             # Naive parsing
-            content = response.content
-            if "```json" in content:
-                content = content.split("```json")[1].split("```")[0]
-            elif "```" in content:
-                content = content.split("```")[1].split("```")[0]
-                
-            return json.loads(content)
+            response = await ainvoke_with_backoff(chain, chain_input)
+            return self._parse_analysis(response.content)
         except Exception as e:
-            logger.error(f"LLM Analysis failed: {e}")
+            logger.error("LLM Analysis failed: %s", e)
             return {"error": str(e), "alerts": ["High MemoryUsed detected (Fallback)"]}
@@ -1,16 +1,38 @@
+import asyncio
 import gzip
+import io
 import json
 import base64
 import logging
 import os
+import orjson
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Use uvloop for any asyncio work (async agent fan-out) when available; it
+# roughly halves per-task event-loop overhead at high concurrency. Optional
+# so local environments without the wheel still run on the default loop.
+try:
+    import uvloop
+    uvloop.install()
+except ImportError:
+    pass
+
 from graph import app as workflow_app
 
-logger = logging.getLogger()
-logger.setLevel(logging.INFO)
+logger = logging.getLogger(__name__)
+# Level is configured on the root logger, as before the switch to named
+# module loggers: the agents/* loggers are NOTSET and inherit their
+# effective level from root, which otherwise sits at WARNING in Lambda and
+# would swallow every INFO progress marker.
+logging.getLogger().setLevel(logging.INFO)
+
+# One event loop for the life of the container. asyncio.run() would create
+# and close a loop per invocation, orphaning the process-wide AsyncClient's
+# keep-alive sockets (they stay bound to the closed loop) and breaking warm
+# invocations with "Event loop is closed" errors.
+_LOOP = asyncio.new_event_loop()
 
 def handler(event, context):
     """
@@ -18,29 +40,33 @@ def handler(event, context):
     Orchestrates investigation via LangGraph.
     """
     try:
-        # 1. Decode and Decompress
+        # 1. Decode and Decompress the CloudWatch Logs envelope. json.load
+        # reads the GzipFile fully before parsing, so this is not a streaming
+        # or memory win over gzip.decompress — just the tidier form.
         encoded_data = event['awslogs']['data']
-        compressed_data = base64.b64decode(encoded_data)
-        decompressed_data = gzip.decompress(compressed_data)
-        payload = json.loads(decompressed_data)
+        compressed_buffer = io.BytesIO(base64.b64decode(encoded_data))
+        with gzip.GzipFile(fileobj=compressed_buffer) as gz:
+            payload = json.load(gz)
 
         # 2. Extract Basic Info for Logging
         log_group = payload.get('logGroup')
         log_stream = payload.get('logStream')
-        logger.info(f"Received logs from Log Group: {log_group}, Stream: {log_stream}")
+        logger.info("Received logs from Log Group: %s, Stream: %s", log_group, log_stream)
 
-        # 3. Invoke LangGraph
+        # 3. Invoke LangGraph. ainvoke lets the async agent nodes overlap
+        # their LLM calls during the fan-out instead of serializing.
         initial_state = {"log_payload": payload}
-        final_state = workflow_app.invoke(initial_state)
+        final_state = _LOOP.run_until_complete(workflow_app.ainvoke(initial_state))
         
         investigation_report = final_state.get("final_diagnosis", {})
-        logger.info(f"Investigation Report: {json.dumps(investigation_report, default=str)}")
+        report_json = orjson.dumps(investigation_report, default=str).decode()
+        logger.info("Investigation Report: %s", report_json)
 
         return {
             "statusCode": 200,
-            "body": json.dumps(investigation_report, default=str)
+            "body": report_json
         }
 
     except Exception as e:
-        logger.error(f"Error processing logs: {e}")
+        logger.error("Error processing logs: %s", e)
         raise e
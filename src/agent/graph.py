@@ -1,5 +1,5 @@
 from typing import TypedDict, Any, Dict, List
-from langgraph.graph import StateGraph, END
+from langgraph.graph import StateGraph, START, END
 from agents.log_agent import LogAgent
 from agents.metrics_agent import MetricsAgent
 from agents.deploy_agent import DeployAgent
@@ -19,30 +19,33 @@ metrics_agent = MetricsAgent()
 deploy_agent = DeployAgent()
 investigation_agent = InvestigationAgent()
 
-# Define Nodes
-def run_log_agent(state: AgentState) -> Dict[str, Any]:
+# Define Nodes. The three specialized agents are async so their LLM calls
+# genuinely overlap when the graph fans out — blocking invoke() in a node
+# would serialize the "parallel" branches on the event loop.
+async def run_log_agent(state: AgentState) -> Dict[str, Any]:
     payload = state.get("log_payload", {})
-    return {"log_analysis": log_agent.analyze(payload)}
+    return {"log_analysis": await log_agent.aanalyze(payload)}
 
-def run_metrics_agent(state: AgentState) -> Dict[str, Any]:
+async def run_metrics_agent(state: AgentState) -> Dict[str, Any]:
     payload = state.get("log_payload", {})
-    return {"metrics_analysis": metrics_agent.analyze(payload)}
+    return {"metrics_analysis": await metrics_agent.aanalyze(payload)}
 
-def run_deploy_agent(state: AgentState) -> Dict[str, Any]:
+async def run_deploy_agent(state: AgentState) -> Dict[str, Any]:
     # Deploy agent creates its own context from files, doesn't strictly need payload but we keep signature consistent
-    return {"deployment_analysis": deploy_agent.analyze()}
+    return {"deployment_analysis": await deploy_agent.aanalyze()}
 
-def run_investigation_agent(state: AgentState) -> Dict[str, Any]:
+async def run_investigation_agent(state: AgentState) -> Dict[str, Any]:
     """
     The Investigation Agent synthesizes findings from all specialized agents
-    and produces a comprehensive final investigation report.
+    and produces a comprehensive final investigation report. Async so the
+    report generation streams instead of blocking the event loop.
     """
     log_analysis = state.get("log_analysis", {})
     metrics_analysis = state.get("metrics_analysis", {})
     deployment_analysis = state.get("deployment_analysis", {})
-    
+
     # Use the LLM-powered Investigation Agent for intelligent synthesis
-    final_report = investigation_agent.synthesize(
+    final_report = await investigation_agent.asynthesize(
         log_analysis=log_analysis,
         metrics_analysis=metrics_analysis,
         deployment_analysis=deployment_analysis
@@ -59,17 +62,12 @@ workflow.add_node("metrics_agent", run_metrics_agent)
 workflow.add_node("deploy_agent", run_deploy_agent)
 workflow.add_node("investigation_agent", run_investigation_agent)
 
-# Set Entry Point with fan-out pattern for parallel execution
-def start_node(state: AgentState):
-    return state
-
-workflow.add_node("start", start_node)
-workflow.set_entry_point("start")
-
-# Fan-out: Start branches to all 3 specialized agents in parallel
-workflow.add_edge("start", "log_agent")
-workflow.add_edge("start", "metrics_agent")
-workflow.add_edge("start", "deploy_agent")
+# Fan-out: edges straight from START branch to all 3 specialized agents in
+# parallel. No passthrough entry node — that cost an extra node execution
+# and state copy per invocation just to enable the fan-out.
+workflow.add_edge(START, "log_agent")
+workflow.add_edge(START, "metrics_agent")
+workflow.add_edge(START, "deploy_agent")
 
 # Fan-in: All specialized agents converge to the Investigation Agent
 workflow.add_edge("log_agent", "investigation_agent")
@@ -1,8 +1,14 @@
+import functools
+
 import boto3
 from botocore.exceptions import ClientError
 import os
 
+@functools.lru_cache(maxsize=1)
 def get_secret():
+    # Cached for the life of the process: the Secrets Manager round-trip is
+    # ~50-150ms, and the key doesn't rotate mid-invocation. Warm Lambda
+    # containers (and any future per-call client construction) hit the cache.
     secret_name = "groq_api_key"
     region_name = "us-east-1"
     
@@ -5,9 +5,19 @@ import sys
 import platform
 
 # Configure logging
-logger = logging.getLogger()
+logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+
+class _LazyJson:
+    """Defers json.dumps until the log record is actually emitted."""
+
+    def __init__(self, obj):
+        self.obj = obj
+
+    def __str__(self):
+        return json.dumps(self.obj, default=str)
+
 def handler(event, context):
     """
     Lambda handler that logs extensive details about the environment and request.
@@ -25,12 +35,12 @@ def handler(event, context):
         "python_version": sys.version,
         "python_executable": sys.executable,
     }
-    logger.info(f"System Info: {json.dumps(system_info)}")
+    logger.info("System Info: %s", _LazyJson(system_info))
 
     # 2. Log Environment Variables
     # Be careful with sensitive data in production, but for this task we log everything as requested.
     env_vars = dict(os.environ)
-    logger.info(f"Environment Variables: {json.dumps(env_vars, default=str)}")
+    logger.info("Environment Variables: %s", _LazyJson(env_vars))
 
     # 3. Log Context Object
     # Context object cannot be directly serialized to JSON easily, so we extract known properties.
@@ -44,10 +54,10 @@ def handler(event, context):
         "log_stream_name": getattr(context, "log_stream_name", "N/A"),
         "remaining_time_ms": context.get_remaining_time_in_millis() if hasattr(context, "get_remaining_time_in_millis") else "N/A"
     }
-    logger.info(f"Context Info: {json.dumps(context_info)}")
+    logger.info("Context Info: %s", _LazyJson(context_info))
 
     # 4. Log Event Payload
-    logger.info(f"Event Payload: {json.dumps(event)}")
+    logger.info("Event Payload: %s", _LazyJson(event))
 
     return {
         "statusCode": 200,